@@ -1,18 +1,25 @@
 from fastapi import FastAPI, HTTPException, Depends, Request, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 from pathlib import Path
 from typing import Optional, Dict, Any, List
-from sqlalchemy import create_engine, Column, String, Integer, Text
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from sqlalchemy import event, Column, String, Integer, Text, LargeBinary, select, update, lambda_stmt
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import httpx
+import asyncio
+import functools
 import json
+import orjson
 import os
 import logging
 from cryptography.fernet import Fernet
+from cachetools import TTLCache
 
 # Configure logging
 logging.basicConfig(
@@ -25,14 +32,54 @@ import hashlib
 
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Driver-less URLs (as set in the Docker files) are mapped onto the bundled async drivers
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+_scheme, _sep, _rest = DATABASE_URL.partition("://")
+ASYNC_DATABASE_URL = f"{ASYNC_DRIVERS.get(_scheme, _scheme)}{_sep}{_rest}"
+if DATABASE_URL.startswith("sqlite"):
+    # aiosqlite keeps each connection on its own worker thread, so check_same_thread isn't needed.
+    # aiosqlite file databases default to NullPool (a new connection, thread and PRAGMAs per
+    # request), so pool them explicitly. StaticPool would share one connection (and transaction)
+    # between concurrent AsyncSessions.
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        query_cache_size=1200,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragma(dbapi_conn, _):
+        # WAL with synchronous=NORMAL avoids an fsync on every commit
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+else:
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=True,
+        query_cache_size=1200,
+    )
+
+AsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 # Encryption key (derived from a fixed seed for simplicity - in production use env var)
 ENCRYPTION_KEY = base64.urlsafe_b64encode(hashlib.sha256(b"metabase-dashboard-creator-key").digest())
 fernet = Fernet(ENCRYPTION_KEY)
 
+@functools.lru_cache(maxsize=256)
+def _decrypt_pw(ciphertext: bytes) -> str:
+    """Decrypt a stored password, memoized on the ciphertext"""
+    # Rows written before the BLOB column still come back as str; Fernet accepts both
+    return fernet.decrypt(ciphertext).decode()
+
 class MetabaseConnection(Base):
     __tablename__ = "metabase_connections"
     
@@ -40,30 +87,75 @@ class MetabaseConnection(Base):
     name = Column(String, unique=True, index=True)
     url = Column(String)
     username = Column(String)
-    password_encrypted = Column(Text)
+    password_encrypted = Column(LargeBinary)
     session_token = Column(Text, nullable=True)
 
-Base.metadata.create_all(bind=engine)
+def _get_conn_stmt(name: str):
+    # lambda_stmt caches the compiled SELECT; only the name is bound per call
+    return lambda_stmt(lambda: select(MetabaseConnection).where(MetabaseConnection.name == name))
+
+# name -> (id, url, username, password_encrypted, session_token); rows rarely change
+_conn_cache: TTLCache = TTLCache(maxsize=64, ttl=30)
+
+async def load_conn(db: AsyncSession, name: str) -> Optional[SimpleNamespace]:
+    """Fetch a connection as a plain snapshot, served from the TTL cache when possible"""
+    cached = _conn_cache.get(name)
+    if cached is None:
+        row = (await db.execute(_get_conn_stmt(name))).scalar_one_or_none()
+        if row is None:
+            return None
+        cached = (row.id, row.url, row.username, row.password_encrypted, row.session_token)
+        _conn_cache[name] = cached
+    conn_id, url, username, password_encrypted, session_token = cached
+    return SimpleNamespace(
+        id=conn_id,
+        name=name,
+        url=url,
+        username=username,
+        password_encrypted=password_encrypted,
+        session_token=session_token,
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # One shared HTTP client for all Metabase calls so connections are kept alive
+    app.state.http = httpx.AsyncClient(
+        verify=False,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        http2=True,
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        await engine.dispose()
+
+app = FastAPI(title="Metabase Creator", lifespan=lifespan, default_response_class=ORJSONResponse)
 
-app = FastAPI(title="Metabase Creator")
+# The bundled frontend is same-origin (or proxied by Vite); list any other origins here
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",") if o.strip()]
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    max_age=600,
 )
 
 # API Router - all API routes under /api
 api_router = APIRouter(prefix="/api")
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+def get_http(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http
 
 # Pydantic models
 class ConnectionCreate(BaseModel):
@@ -93,64 +185,53 @@ class ValidationResult(BaseModel):
 
 # Metabase API client
 class MetabaseClient:
-    def __init__(self, base_url: str, session_token: str):
+    def __init__(self, client: httpx.AsyncClient, base_url: str, session_token: str):
+        self.client = client
         self.base_url = base_url.rstrip('/')
         self.session_token = session_token
         self.headers = {"X-Metabase-Session": session_token}
     
+    async def request_raw(self, method: str, endpoint: str, data: Optional[Dict] = None) -> bytes:
+        response = await self.client.request(
+            method,
+            f"{self.base_url}/api{endpoint}",
+            headers=self.headers,
+            json=data
+        )
+        response.raise_for_status()
+        return response.content
+    
+    async def request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
+        return orjson.loads(await self.request_raw(method, endpoint, data))
+    
     async def get(self, endpoint: str) -> Dict:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(
-                f"{self.base_url}/api{endpoint}",
-                headers=self.headers,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self.request("GET", endpoint)
     
     async def post(self, endpoint: str, data: Dict) -> Dict:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(
-                f"{self.base_url}/api{endpoint}",
-                headers=self.headers,
-                json=data,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self.request("POST", endpoint, data)
     
     async def put(self, endpoint: str, data: Dict) -> Dict:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.put(
-                f"{self.base_url}/api{endpoint}",
-                headers=self.headers,
-                json=data,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
-
-async def get_metabase_session(url: str, username: str, password: str) -> str:
+        return await self.request("PUT", endpoint, data)
+
+async def get_metabase_session(client: httpx.AsyncClient, url: str, username: str, password: str) -> str:
     session_url = f"{url.rstrip('/')}/api/session"
     logger.info(f"Attempting to connect to Metabase at: {session_url}")
     logger.info(f"Username: {username}")
 
     try:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(
-                session_url,
-                json={"username": username, "password": password},
-                timeout=30.0
-            )
-            logger.info(f"Metabase response status: {response.status_code}")
-
-            if response.status_code != 200:
-                logger.error(f"Metabase error response: {response.text}")
-
-            response.raise_for_status()
-            session_id = response.json()["id"]
-            logger.info(f"Successfully connected to Metabase, session obtained")
-            return session_id
+        response = await client.post(
+            session_url,
+            json={"username": username, "password": password}
+        )
+        logger.info(f"Metabase response status: {response.status_code}")
+
+        if response.status_code != 200:
+            logger.error(f"Metabase error response: {response.text}")
+
+        response.raise_for_status()
+        session_id = orjson.loads(response.content)["id"]
+        logger.info(f"Successfully connected to Metabase, session obtained")
+        return session_id
     except httpx.ConnectError as e:
         logger.error(f"Connection error to {session_url}: {e}")
         raise
@@ -161,6 +242,53 @@ async def get_metabase_session(url: str, username: str, password: str) -> str:
         logger.error(f"Unexpected error connecting to Metabase: {type(e).__name__}: {e}")
         raise
 
+# Session tokens keyed by connection name, so a refresh is visible to later requests
+_token_cache: Dict[str, str] = {}
+
+async def refresh_session(conn: SimpleNamespace, http: httpx.AsyncClient, db: AsyncSession) -> str:
+    """Log in again with the stored credentials and persist the new token"""
+    # Fernet work holds the GIL; keep it off the event loop
+    password = await asyncio.to_thread(_decrypt_pw, conn.password_encrypted)
+    conn.session_token = await get_metabase_session(http, conn.url, conn.username, password)
+    await db.execute(
+        update(MetabaseConnection)
+        .where(MetabaseConnection.id == conn.id)
+        .values(session_token=conn.session_token)
+    )
+    await db.commit()
+    _token_cache[conn.name] = conn.session_token
+    if conn.name in _conn_cache:
+        _conn_cache[conn.name] = (conn.id, conn.url, conn.username, conn.password_encrypted, conn.session_token)
+    return conn.session_token
+
+async def authed_client(conn: SimpleNamespace, http: httpx.AsyncClient, db: AsyncSession) -> MetabaseClient:
+    """Build a client with the best known token, logging in if there is none"""
+    token = _token_cache.get(conn.name) or conn.session_token
+    if not token:
+        token = await refresh_session(conn, http, db)
+    return MetabaseClient(http, conn.url, token)
+
+async def call_with_retry(conn: SimpleNamespace, http: httpx.AsyncClient, db: AsyncSession,
+                          method: str, endpoint: str, data: Optional[Dict] = None, raw: bool = False):
+    """Call the Metabase API, logging in again once if the token has expired.
+
+    With raw=True the undecoded response body is returned instead of parsed JSON.
+    """
+    client = await authed_client(conn, http, db)
+    send = client.request_raw if raw else client.request
+    try:
+        return await send(method, endpoint, data)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 401:
+            raise
+        token = await refresh_session(conn, http, db)
+        client = MetabaseClient(http, conn.url, token)
+        send = client.request_raw if raw else client.request
+        return await send(method, endpoint, data)
+
+# Maximum number of card creation requests in flight per dashboard
+CARD_CONCURRENCY = 10
+
 # Visualization type mapping
 VIZ_TYPE_MAP = {
     "metric_card": "scalar",
@@ -174,18 +302,15 @@ VIZ_TYPE_MAP = {
     "data_table": "table",
 }
 
+_viz_get = VIZ_TYPE_MAP.get
+
 def map_visualization_type(spec_type: str) -> str:
-    return VIZ_TYPE_MAP.get(spec_type, "table")
+    return _viz_get(spec_type, "table")
 
-def convert_grid_position(spec_pos: Dict, spec_columns: int = 12) -> Dict:
-    """Convert from spec grid (12 cols) to Metabase grid (24 cols)"""
-    scale = 24 / spec_columns
-    return {
-        "col": int(spec_pos.get("col", 0) * scale),
-        "row": int(spec_pos.get("row", 0)),
-        "size_x": int(spec_pos.get("width", 4) * scale),
-        "size_y": int(spec_pos.get("height", 4)),
-    }
+@functools.lru_cache(maxsize=1024)
+def scale_grid_position(col, row, width, height, scale: float) -> tuple:
+    """Scale a spec grid cell to Metabase's (col, row, size_x, size_y)"""
+    return int(col * scale), int(row), int(width * scale), int(height)
 
 # Routes
 @api_router.get("/")
@@ -193,15 +318,15 @@ async def root():
     return {"status": "ok", "message": "Metabase Dashboard Creator API"}
 
 @api_router.post("/connections", response_model=ConnectionResponse)
-async def create_connection(conn: ConnectionCreate, db: Session = Depends(get_db)):
+async def create_connection(conn: ConnectionCreate, db: AsyncSession = Depends(get_db), http: httpx.AsyncClient = Depends(get_http)):
     logger.info(f"Creating connection '{conn.name}' to {conn.url}")
 
     # Check if connection exists
-    existing = db.query(MetabaseConnection).filter(MetabaseConnection.name == conn.name).first()
+    existing = (await db.execute(_get_conn_stmt(conn.name))).scalar_one_or_none()
 
     # Test connection
     try:
-        session_token = await get_metabase_session(conn.url, conn.username, conn.password)
+        session_token = await get_metabase_session(http, conn.url, conn.username, conn.password)
     except httpx.ConnectError as e:
         error_msg = f"Cannot reach Metabase at {conn.url}. Check URL and network connectivity."
         logger.error(f"Connection failed: {error_msg} - {e}")
@@ -224,49 +349,50 @@ async def create_connection(conn: ConnectionCreate, db: Session = Depends(get_db
         logger.error(f"Connection failed: {error_msg}")
         raise HTTPException(status_code=400, detail=error_msg)
     
-    encrypted_password = fernet.encrypt(conn.password.encode()).decode()
+    encrypted_password = await asyncio.to_thread(fernet.encrypt, conn.password.encode())
     
     if existing:
         existing.url = conn.url
         existing.username = conn.username
         existing.password_encrypted = encrypted_password
         existing.session_token = session_token
-        db.commit()
-        db.refresh(existing)
-        return ConnectionResponse(
-            id=existing.id,
-            name=existing.name,
-            url=existing.url,
-            username=existing.username,
-            is_connected=True
+        conn_id = existing.id
+        await db.commit()
+    else:
+        new_conn = MetabaseConnection(
+            name=conn.name,
+            url=conn.url,
+            username=conn.username,
+            password_encrypted=encrypted_password,
+            session_token=session_token
         )
+        db.add(new_conn)
+        # flush assigns the primary key, so no refresh SELECT is needed after commit
+        await db.flush()
+        conn_id = new_conn.id
+        await db.commit()
     
-    new_conn = MetabaseConnection(
+    # Update the caches only after the commit, so a concurrent load_conn can't re-cache the old row
+    _decrypt_pw.cache_clear()
+    _token_cache[conn.name] = session_token
+    _conn_cache.pop(conn.name, None)
+    
+    return ConnectionResponse(
+        id=conn_id,
         name=conn.name,
         url=conn.url,
         username=conn.username,
-        password_encrypted=encrypted_password,
-        session_token=session_token
-    )
-    db.add(new_conn)
-    db.commit()
-    db.refresh(new_conn)
-    
-    return ConnectionResponse(
-        id=new_conn.id,
-        name=new_conn.name,
-        url=new_conn.url,
-        username=new_conn.username,
         is_connected=True
     )
 
 @api_router.get("/connections", response_model=List[ConnectionResponse])
-async def list_connections(db: Session = Depends(get_db)):
+async def list_connections(db: AsyncSession = Depends(get_db)):
     logger.info("Fetching all connections")
-    connections = db.query(MetabaseConnection).all()
+    connections = (await db.execute(select(MetabaseConnection))).scalars().all()
     logger.info(f"Found {len(connections)} connection(s)")
+    # Rows come from our own table, so skip per-field validation
     return [
-        ConnectionResponse(
+        ConnectionResponse.model_construct(
             id=c.id,
             name=c.name,
             url=c.url,
@@ -277,11 +403,11 @@ async def list_connections(db: Session = Depends(get_db)):
     ]
 
 @api_router.get("/connections/{name}")
-async def get_connection(name: str, db: Session = Depends(get_db)):
-    conn = db.query(MetabaseConnection).filter(MetabaseConnection.name == name).first()
+async def get_connection(name: str, db: AsyncSession = Depends(get_db)):
+    conn = await load_conn(db, name)
     if not conn:
         raise HTTPException(status_code=404, detail="Connection not found")
-    return ConnectionResponse(
+    return ConnectionResponse.model_construct(
         id=conn.id,
         name=conn.name,
         url=conn.url,
@@ -290,62 +416,39 @@ async def get_connection(name: str, db: Session = Depends(get_db)):
     )
 
 @api_router.delete("/connections/{name}")
-async def delete_connection(name: str, db: Session = Depends(get_db)):
-    conn = db.query(MetabaseConnection).filter(MetabaseConnection.name == name).first()
+async def delete_connection(name: str, db: AsyncSession = Depends(get_db)):
+    conn = (await db.execute(_get_conn_stmt(name))).scalar_one_or_none()
     if not conn:
         raise HTTPException(status_code=404, detail="Connection not found")
-    db.delete(conn)
-    db.commit()
+    await db.delete(conn)
+    await db.commit()
+    _decrypt_pw.cache_clear()
+    _token_cache.pop(name, None)
+    _conn_cache.pop(name, None)
     return {"status": "deleted"}
 
 @api_router.get("/connections/{name}/databases")
-async def get_databases(name: str, db: Session = Depends(get_db)):
-    conn = db.query(MetabaseConnection).filter(MetabaseConnection.name == name).first()
+async def get_databases(name: str, db: AsyncSession = Depends(get_db), http: httpx.AsyncClient = Depends(get_http)):
+    conn = await load_conn(db, name)
     if not conn:
         raise HTTPException(status_code=404, detail="Connection not found")
     
-    if not conn.session_token:
-        # Try to reconnect
-        password = fernet.decrypt(conn.password_encrypted.encode()).decode()
-        conn.session_token = await get_metabase_session(conn.url, conn.username, password)
-        db.commit()
-    
-    client = MetabaseClient(conn.url, conn.session_token)
     try:
-        databases = await client.get("/database")
-        return databases
+        raw = await call_with_retry(conn, http, db, "GET", "/database", raw=True)
+        return Response(content=raw, media_type="application/json")
     except httpx.HTTPStatusError as e:
-        if e.response.status_code == 401:
-            # Token expired, reconnect
-            password = fernet.decrypt(conn.password_encrypted.encode()).decode()
-            conn.session_token = await get_metabase_session(conn.url, conn.username, password)
-            db.commit()
-            client = MetabaseClient(conn.url, conn.session_token)
-            return await client.get("/database")
         raise HTTPException(status_code=e.response.status_code, detail=str(e))
 
 @api_router.get("/connections/{name}/collections")
-async def get_collections(name: str, db: Session = Depends(get_db)):
-    conn = db.query(MetabaseConnection).filter(MetabaseConnection.name == name).first()
+async def get_collections(name: str, db: AsyncSession = Depends(get_db), http: httpx.AsyncClient = Depends(get_http)):
+    conn = await load_conn(db, name)
     if not conn:
         raise HTTPException(status_code=404, detail="Connection not found")
     
-    if not conn.session_token:
-        password = fernet.decrypt(conn.password_encrypted.encode()).decode()
-        conn.session_token = await get_metabase_session(conn.url, conn.username, password)
-        db.commit()
-    
-    client = MetabaseClient(conn.url, conn.session_token)
     try:
-        collections = await client.get("/collection")
-        return collections
+        raw = await call_with_retry(conn, http, db, "GET", "/collection", raw=True)
+        return Response(content=raw, media_type="application/json")
     except httpx.HTTPStatusError as e:
-        if e.response.status_code == 401:
-            password = fernet.decrypt(conn.password_encrypted.encode()).decode()
-            conn.session_token = await get_metabase_session(conn.url, conn.username, password)
-            db.commit()
-            client = MetabaseClient(conn.url, conn.session_token)
-            return await client.get("/collection")
         raise HTTPException(status_code=e.response.status_code, detail=str(e))
 
 @api_router.post("/validate")
@@ -373,23 +476,24 @@ async def validate_spec(spec: Dict[str, Any]):
         
         components_count = 0
         queries_needed = set()
+        queries = spec.get("queries", {})
         
         for section in sections:
-            if "components" not in section:
+            components = section.get("components")
+            if components is None:
                 warnings.append(f"Section '{section.get('id', 'unknown')}' has no components")
                 continue
             
-            for component in section["components"]:
+            for component in components:
                 components_count += 1
-                if "query_id" in component:
-                    queries_needed.add(component["query_id"])
+                query_id = component.get("query_id")
+                if query_id is None:
+                    continue
+                queries_needed.add(query_id)
                 
                 # Check if query is defined
-                if "query_id" in component:
-                    query_id = component["query_id"]
-                    queries = spec.get("queries", {})
-                    if query_id not in queries:
-                        errors.append(f"Component '{component.get('id', 'unknown')}' references undefined query: {query_id}")
+                if query_id not in queries:
+                    errors.append(f"Component '{component.get('id', 'unknown')}' references undefined query: {query_id}")
         
         summary["components_count"] = components_count
         summary["queries_count"] = len(queries_needed)
@@ -412,19 +516,13 @@ async def validate_spec(spec: Dict[str, Any]):
     )
 
 @api_router.post("/create-dashboard")
-async def create_dashboard(request: DashboardSpec, db: Session = Depends(get_db)):
+async def create_dashboard(request: DashboardSpec, db: AsyncSession = Depends(get_db), http: httpx.AsyncClient = Depends(get_http)):
     """Create a complete dashboard in Metabase from the specification"""
     
-    conn = db.query(MetabaseConnection).filter(MetabaseConnection.name == request.connection_name).first()
+    conn = await load_conn(db, request.connection_name)
     if not conn:
         raise HTTPException(status_code=404, detail=f"Connection '{request.connection_name}' not found")
     
-    if not conn.session_token:
-        password = fernet.decrypt(conn.password_encrypted.encode()).decode()
-        conn.session_token = await get_metabase_session(conn.url, conn.username, password)
-        db.commit()
-    
-    client = MetabaseClient(conn.url, conn.session_token)
     spec = request.spec
     
     try:
@@ -437,19 +535,32 @@ async def create_dashboard(request: DashboardSpec, db: Session = Depends(get_db)
         if request.collection_id:
             dashboard_data["collection_id"] = request.collection_id
         
-        dashboard = await client.post("/dashboard", dashboard_data)
+        dashboard = await call_with_retry(conn, http, db, "POST", "/dashboard", dashboard_data)
         dashboard_id = dashboard["id"]
+        client = await authed_client(conn, http, db)
         
         # 2. Create cards for each component
-        created_cards = []
-        card_positions = []
+        card_jobs = []
         queries = spec.get("queries", {})
         grid_columns = spec.get("layout", {}).get("columns", 12)
+        scale = 24 / grid_columns
         
-        for section in spec.get("sections", []):
+        # Bind loop-invariant lookups to locals; this loop runs once per component
+        database_id = request.database_id
+        collection_id = request.collection_id
+        map_viz = map_visualization_type
+        viz_settings = build_viz_settings
+        scale_pos = scale_grid_position
+        add_job = card_jobs.append
+        
+        for section in spec.get("sections", ()):
             section_pos = section.get("position", {"row": 0, "col": 0, "width": 12, "height": 4})
+            section_col = section_pos.get("col", 0)
+            section_row = section_pos.get("row", 0)
+            section_width = section_pos.get("width", 4)
+            section_height = section_pos.get("height", 4)
             
-            for idx, component in enumerate(section.get("components", [])):
+            for idx, component in enumerate(section.get("components", ())):
                 query_id = component.get("query_id")
                 if not query_id or query_id not in queries:
                     continue
@@ -458,7 +569,7 @@ async def create_dashboard(request: DashboardSpec, db: Session = Depends(get_db)
                 sql = query_def.get("sql", f"-- Query: {query_id}\nSELECT 1")
                 
                 # Create the card/question
-                viz_type = map_visualization_type(component.get("type", "data_table"))
+                viz_type = map_viz(component.get("type", "data_table"))
                 config = component.get("config", {})
                 
                 card_data = {
@@ -469,50 +580,65 @@ async def create_dashboard(request: DashboardSpec, db: Session = Depends(get_db)
                             "query": sql,
                             "template-tags": {}
                         },
-                        "database": request.database_id
+                        "database": database_id
                     },
                     "display": viz_type,
-                    "visualization_settings": build_viz_settings(component),
+                    "visualization_settings": viz_settings(component),
                 }
-                if request.collection_id:
-                    card_data["collection_id"] = request.collection_id
-                
-                card = await client.post("/card", card_data)
-                created_cards.append(card)
+                if collection_id:
+                    card_data["collection_id"] = collection_id
                 
                 # Calculate position
                 comp_pos = component.get("position", {})
                 if "order" in comp_pos:
                     # Horizontal layout within section
                     width = comp_pos.get("width", 3)
-                    pos = {
-                        "col": section_pos.get("col", 0) + (comp_pos["order"] - 1) * width,
-                        "row": section_pos.get("row", 0),
-                        "width": width,
-                        "height": section_pos.get("height", 4)
-                    }
+                    col = section_col + (comp_pos["order"] - 1) * width
                 else:
-                    pos = section_pos.copy()
+                    width = section_width
+                    col = section_col
                 
-                mb_pos = convert_grid_position(pos, grid_columns)
-                card_positions.append({
-                    "id": card["id"],
-                    "card_id": card["id"],
-                    **mb_pos
-                })
+                add_job((card_data, scale_pos(col, section_row, width, section_height, scale)))
+        
+        # Create the cards concurrently, bounded so Metabase isn't flooded
+        semaphore = asyncio.Semaphore(CARD_CONCURRENCY)
+        
+        async def create_card(card_data: Dict) -> Dict:
+            async with semaphore:
+                return await client.post("/card", card_data)
+        
+        tasks = [asyncio.create_task(create_card(card_data)) for card_data, _ in card_jobs]
+        try:
+            created_cards = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the remaining creates so an error response means nothing is still being written
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        card_positions = [
+            {
+                "id": card["id"],
+                "card_id": card["id"],
+                "col": mb_pos[0],
+                "row": mb_pos[1],
+                "size_x": mb_pos[2],
+                "size_y": mb_pos[3],
+            }
+            for card, (_, mb_pos) in zip(created_cards, card_jobs)
+        ]
         
-        # 3. Add cards to dashboard
+        # 3. Add cards and filters/parameters to dashboard in a single update
+        update_payload = {}
         if card_positions:
-            await client.put(f"/dashboard/{dashboard_id}", {
-                "dashcards": card_positions
-            })
+            update_payload["dashcards"] = card_positions
         
-        # 4. Add filters/parameters
         parameters = build_parameters(spec.get("filters", {}))
         if parameters:
-            await client.put(f"/dashboard/{dashboard_id}", {
-                "parameters": parameters
-            })
+            update_payload["parameters"] = parameters
+        
+        if update_payload:
+            await client.put(f"/dashboard/{dashboard_id}", update_payload)
         
         dashboard_url = f"{conn.url}/dashboard/{dashboard_id}"
         
@@ -527,45 +653,60 @@ async def create_dashboard(request: DashboardSpec, db: Session = Depends(get_db)
     except httpx.HTTPStatusError as e:
         error_detail = str(e)
         try:
-            error_detail = e.response.json()
+            error_detail = orjson.loads(e.response.content)
         except:
             pass
         raise HTTPException(status_code=e.response.status_code, detail=error_detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def build_viz_settings(component: Dict) -> Dict:
-    """Build Metabase visualization settings from component config"""
-    config = component.get("config", {})
-    comp_type = component.get("type", "")
-    settings = {}
-    
-    if comp_type in ["metric_card", "metric_card_with_status"]:
-        settings["scalar.field"] = "value"
-        if config.get("format") == "percentage":
-            settings["number_style"] = "percent"
-        elif config.get("format") == "number_abbreviated":
-            settings["number_style"] = "compact"
-    
-    elif comp_type == "data_table":
-        columns = config.get("columns", [])
-        settings["table.columns"] = [
+def _viz_scalar(config: Dict) -> Dict:
+    settings = {"scalar.field": "value"}
+    fmt = config.get("format")
+    if fmt == "percentage":
+        settings["number_style"] = "percent"
+    elif fmt == "number_abbreviated":
+        settings["number_style"] = "compact"
+    return settings
+
+def _viz_table(config: Dict) -> Dict:
+    return {
+        "table.columns": [
             {"name": col.get("field"), "enabled": True}
-            for col in columns
+            for col in config.get("columns", ())
         ]
-    
-    elif comp_type in ["area_chart", "line_chart", "bar_chart"]:
-        if "x_axis" in config:
-            settings["graph.x_axis.title_text"] = config["x_axis"].get("label", "")
-        if "y_axis" in config:
-            settings["graph.y_axis.title_text"] = config["y_axis"].get("label", "")
-    
-    elif comp_type == "donut_chart":
-        settings["pie.show_legend"] = config.get("show_legend", True)
-        settings["pie.show_total"] = config.get("show_center_total", True)
-    
+    }
+
+def _viz_graph(config: Dict) -> Dict:
+    settings = {}
+    if "x_axis" in config:
+        settings["graph.x_axis.title_text"] = config["x_axis"].get("label", "")
+    if "y_axis" in config:
+        settings["graph.y_axis.title_text"] = config["y_axis"].get("label", "")
     return settings
 
+def _viz_pie(config: Dict) -> Dict:
+    return {
+        "pie.show_legend": config.get("show_legend", True),
+        "pie.show_total": config.get("show_center_total", True),
+    }
+
+# Component type -> settings builder; types without an entry get no settings
+VIZ_SETTINGS_BUILDERS = {
+    "metric_card": _viz_scalar,
+    "metric_card_with_status": _viz_scalar,
+    "data_table": _viz_table,
+    "area_chart": _viz_graph,
+    "line_chart": _viz_graph,
+    "bar_chart": _viz_graph,
+    "donut_chart": _viz_pie,
+}
+
+def build_viz_settings(component: Dict) -> Dict:
+    """Build Metabase visualization settings from component config"""
+    builder = VIZ_SETTINGS_BUILDERS.get(component.get("type", ""))
+    return builder(component.get("config", {})) if builder else {}
+
 def build_parameters(filters_spec: Dict) -> List[Dict]:
     """Build Metabase parameters from filters specification"""
     parameters = []
@@ -585,16 +726,19 @@ def build_parameters(filters_spec: Dict) -> List[Dict]:
     
     return parameters
 
+FILTER_TYPE_MAP = {
+    "date_range_preset": "date/all-options",
+    "multi_select": "string/=",
+    "single_select": "string/=",
+    "text": "string/contains",
+    "number": "number/=",
+}
+
+_filter_get = FILTER_TYPE_MAP.get
+
 def map_filter_type(spec_type: str) -> str:
     """Map spec filter types to Metabase parameter types"""
-    type_map = {
-        "date_range_preset": "date/all-options",
-        "multi_select": "string/=",
-        "single_select": "string/=",
-        "text": "string/contains",
-        "number": "number/=",
-    }
-    return type_map.get(spec_type, "string/=")
+    return _filter_get(spec_type, "string/=")
 
 # Include API router
 app.include_router(api_router)
@@ -614,4 +758,4 @@ if STATIC_DIR.exists():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools", log_level="warning")